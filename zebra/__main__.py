@@ -3,15 +3,19 @@ import subprocess
 import re
 import json
 
+# One scan per line instead of three substring searches; the shared
+# "Z" prefix rejects most non-Zebra lines after the first character.
+_ZEBRA_TOK = re.compile(r"Z(?:ebra|TC|PL)")
+
 def system_command(command: str, timeout: int = 7):
     r = subprocess.run(command.split(),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            capture_output=True,
+            text=True,
             timeout=timeout)
     return {
         "status": r.returncode,
-        "stdout": r.stdout.decode("utf-8"),
-        "stderr": r.stderr.decode("utf-8"),
+        "stdout": r.stdout,
+        "stderr": r.stderr,
     }
 
 class Zebra:
@@ -24,15 +28,13 @@ class Zebra:
         printers = {}
 
         for device in iter(installed.splitlines()):
-            if any(i in device for i in ["Zebra", "ZTC", "ZPL"]):
-                """
-                n, u = device.split(": usb://")
-                name = n.strip("device for ")
-                printers[n.strip("device for ")] = "usb://" + u
-                """
-                
-                uri = re.search(r'usb://[^ ]*', device)[0]
-                name = device.split(":", maxsplit=1)[0].strip("device for ")
+            if _ZEBRA_TOK.search(device):
+                i = device.find("usb://")
+                if i < 0:
+                    continue
+
+                uri = device[i:].split(None, 1)[0]
+                name = device.partition(":")[0].removeprefix("device for ").strip()
                 printers[name] = uri
 
         return printers
@@ -47,8 +49,12 @@ class Zebra:
 
         for device in iter(connected.splitlines()):
             if "Zebra" in device:
-                uri = re.search(r'usb://[^ ]*', device)[0]
-                serial_number = uri.rsplit("=", maxsplit=1)[-1]
+                i = device.find("usb://")
+                if i < 0:
+                    continue
+
+                uri = device[i:].split(None, 1)[0]
+                serial_number = uri.rpartition("=")[2]
                 printers[serial_number] = {
                         "uri": uri,
                         "installed": uri in installed_printers.keys(),
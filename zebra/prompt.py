@@ -1,14 +1,37 @@
 import time
 import sys
 import re
+import functools
 from termios import tcflush, TCIFLUSH
 from typing import List, Tuple
-from dateutil.relativedelta import relativedelta, MO
 from datetime import date
 
 from .utils import get_operator
 from . import log
 
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+@functools.lru_cache(maxsize=1)
+def _date_choices():
+    """
+    Shortcuts accepted by _ask_date, each resolved against the "today"
+    snapshot the caller passes in. Built lazily -- most prompts never
+    need the dateutil import.
+    """
+
+    from dateutil.relativedelta import relativedelta, MO
+
+    return {
+        "w": lambda today: (today + relativedelta(weekday=MO(-1))).strftime("%Y-%m-%d"),
+        "t": lambda today: today.strftime("%Y-%m-%d"),
+        "m": lambda today: (today - relativedelta(days=30)).strftime("%Y-%m-%d"),
+    }
+
+# The operator identity does not change mid-process; remember it so
+# repeated prompts dont redo the lookup every time.
+get_operator = functools.lru_cache(maxsize=1)(get_operator)
+
 
 class Prompt:
     """
@@ -25,16 +48,15 @@ class Prompt:
     ENDC = "\033[0m\033[0m"
 
     @staticmethod
-    def date_range() -> Tuple[str, str]:
+    def _ask_date(label: str, today: date = None) -> str:
         """
-        Ask user start and end date.
-        Use case: asking for records generated between date YYYY-MM-DD and YYYY2-MM2-DD2.
-
-        Returns
-        -------
-            Tuple(str(start_date), str(end_date)
+        Keep prompting until the operator enters a w/t/m shortcut or a
+        literal YYYY-MM-DD date; return the resolved YYYY-MM-DD string.
+        Shortcuts resolve against `today`, defaulting to date.today().
         """
 
+        today = today or date.today()
+        choices = _date_choices()
         while True:
             print("""\nValid options:
     * w -- since Monday
@@ -42,62 +64,33 @@ class Prompt:
     * m -- 30 days ago
     """
             )
-            start_date = Prompt.input("ENTER START DATE")
-            if start_date == "w":
-                today = date.today()
-                last_monday = today + relativedelta(weekday=MO(-1))
-                start_date = last_monday.strftime("%Y-%m-%d")
-                break
+            user_input = Prompt.input(label)
+            if user_input in choices:
+                return choices[user_input](today)
 
-            if start_date == "t":
-                today = date.today()
-                start_date = today.strftime("%Y-%m-%d")
-                break
-            
-            if start_date == "m":
-                today = date.today()
-                mo = today - relativedelta(days=30)
-                start_date = mo.strftime("%Y-%m-%d")
-                break
-
-            p = re.compile("\d{4}-\d{2}-\d{2}")
-            if p.match(start_date):
-                break
+            if _DATE_RE.match(user_input):
+                return user_input
 
             print(Prompt.YLW + "Nope! Expecting YYYY-MM-DD." + Prompt.ENDC + "\n")
 
-        while True:
-            print("""\nValid options:
-    * w -- since Monday
-    * t -- today
-    * m -- 30 days ago
-    """
-            )
-            end_date = Prompt.input("ENTER END DATE")
-            if end_date == "w":
-                today = date.today()
-                last_monday = today + relativedelta(weekday=MO(-1))
-                end_date = last_monday.strftime("%Y-%m-%d")
-                break
-
-            if end_date == "t":
-                today = date.today()
-                end_date = today.strftime("%Y-%m-%d")
-                break
-            
-            if end_date == "m":
-                today = date.today()
-                mo = today - relativedelta(days=30)
-                end_date = mo.strftime("%Y-%m-%d")
-                break
-
-            p = re.compile("\d{4}-\d{2}-\d{2}")
-            if p.match(end_date):
-                break
+    @staticmethod
+    def date_range() -> Tuple[str, str]:
+        """
+        Ask user start and end date.
+        Use case: asking for records generated between date YYYY-MM-DD and YYYY2-MM2-DD2.
 
-            print(Prompt.YLW + "Nope! Expecting YYYY-MM-DD." + Prompt.ENDC + "\n")
+        Returns
+        -------
+            Tuple(str(start_date), str(end_date)
+        """
 
-        return (start_date, end_date)
+        # One shared snapshot, so start and end shortcuts cant disagree
+        # when the prompts straddle midnight.
+        today = date.today()
+        return (
+            Prompt._ask_date("ENTER START DATE", today),
+            Prompt._ask_date("ENTER END DATE", today),
+        )
 
     @staticmethod
     def choose(prompt: str, options: List) -> str:
@@ -125,6 +118,15 @@ class Prompt:
 
             log.error(f'"{user_input}" is not a valid option!')
 
+    @staticmethod
+    def _operator_cache_clear():
+        """
+        Forget the memoized operator, e.g. for scripts
+        that change identity mid-run.
+        """
+
+        get_operator.cache_clear()
+
     @staticmethod
     def confirm(prompt: str):
         """
@@ -155,19 +157,26 @@ class Prompt:
                 break
 
     @staticmethod
-    def wait(seconds: int, prompt: str = "Retrying in"):
+    def wait(seconds: float, prompt: str = "Retrying in"):
         """
         Essentially a nice "interactive" sleep time with a countdown.
+        Redraws a single line in place instead of logging one line per
+        second, and wakes at most twice a second so Ctrl-C is snappy.
         """
 
         print("")
-        for i in range(1, seconds + 1):
-            log.info(
-                f"{prompt} {seconds-i} seconds...",
-                fg="white",
-                inline=True,
-            )
-            time.sleep(1)
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            sys.stdout.write(f"\r>> {prompt} {int(remaining)} seconds... ")
+            sys.stdout.flush()
+            time.sleep(min(0.5, remaining))
+
+        sys.stdout.write("\n")
+        sys.stdout.flush()
 
     @staticmethod
     def input(prompt: str, flush: bool = False) -> str:
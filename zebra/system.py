@@ -1,11 +1,37 @@
-import os
+import time
 import asyncio
-import fileinput
 import subprocess
 import shlex
-import pathlib
 from typing import Tuple, Dict
 
+# Cache of decoded command output, keyed by the command string.
+# Callers opt in via system_command(cmd, cache_ttl=...) -- useful for
+# slow probes like lpinfo/lpstat that get re-run many times per invocation.
+_cmd_cache: Dict[str, Tuple[float, Tuple[int, str, str]]] = {}
+
+
+def invalidate_cache(*cmds: str):
+    """
+    Drop cached results for the given commands.
+    With no arguments, drop everything.
+    """
+
+    if not cmds:
+        _cmd_cache.clear()
+        return
+
+    for cmd in cmds:
+        _cmd_cache.pop(cmd, None)
+
+
+def cache_command_result(cmd: str, result: Tuple[int, str, str]):
+    """
+    Seed the command cache with a result obtained through another path
+    (e.g. exec_command_async), so cache_ttl callers can reuse it.
+    """
+
+    _cmd_cache[cmd] = (time.monotonic(), result)
+
 def get_serial_port(vid=None, pid=None):
     lsusb = system_command("lsusb")[1]
 
@@ -22,27 +48,26 @@ def get_serial_port(vid=None, pid=None):
         print("You must pass either vid or pid args.")
         return None
 
-    vid_match = pid_match = port_match = None
-    for f in pathlib.Path("/dev/serial/by-id").glob("**/*"):
-        port = "/dev/" + os.readlink(f).rsplit("/", maxsplit=1)[-1]
-
-        if vid:
-            cmd = f"udevadm info -n {port} -q property | grep VENDOR_ID | cut -d'=' -f2"
-            status, stdout, stderr = pipeable_command(cmd)
-            if vid == stdout.strip():
-                vid_match = True
+    # One udevadm dump for the whole system instead of a grep|cut
+    # pipeline (3 processes) per port per id.
+    db = system_command("udevadm info --export-db")[1] or ""
+    for block in db.split("\n\n"):
+        props = dict(
+            line[3:].split("=", 1)
+            for line in block.splitlines()
+            if line.startswith("E: ") and "=" in line
+        )
 
-        if pid:
-            cmd = f"udevadm info -n {port} -q property | grep MODEL_ID | cut -d'=' -f2"
-            status, stdout, stderr = pipeable_command(cmd)
-            if pid == stdout.strip():
-                pid_match = True
+        if props.get("SUBSYSTEM") != "tty":
+            continue
+        if vid and props.get("ID_VENDOR_ID") != vid:
+            continue
+        if pid and props.get("ID_MODEL_ID") != pid:
+            continue
 
-        if (vid and vid_match) and (pid and pid_match) or (not vid and pid_match) or (not pid and vid_match):
-            port_match = port
-            break
+        return props.get("DEVNAME")
 
-    return port_match
+    return None
 
 
 async def exec_command_async(cmd: str) -> Tuple[int, str, str]:
@@ -63,41 +88,42 @@ async def exec_command_async(cmd: str) -> Tuple[int, str, str]:
 
 
 def pipeable_command(cmd: str) -> Tuple[int, str, str]:
-    with subprocess.Popen(
-        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True
-    ) as p:
-        stdout, stderr = p.communicate()
-        status = int(p.returncode)
-
-    stdout = stdout.decode("utf8", errors="ignore")
-    stderr = stderr.decode("utf8", errors="ignore")
-
-    return status, stdout, stderr
+    r = subprocess.run(
+        cmd, shell=True, capture_output=True, text=True, errors="ignore"
+    )
+    return r.returncode, r.stdout, r.stderr
 
 
 def noblock_command(cmd: str):
     subprocess.Popen([cmd], shell=True)
 
 
-def system_command(cmd: str) -> Tuple[int, str, str]:
+def system_command(cmd: str, cache_ttl: float = 0) -> Tuple[int, str, str]:
     """
     IMPORTANT: this function does not support pipes.
+
+    Pass cache_ttl > 0 (seconds) to reuse the output of an identical
+    command executed less than cache_ttl seconds ago. Slow enumerations
+    (lpinfo, lpstat) benefit greatly; leave it at 0 for anything whose
+    output must be fresh.
     """
 
+    if cache_ttl > 0:
+        cached = _cmd_cache.get(cmd)
+        if cached and time.monotonic() - cached[0] < cache_ttl:
+            return cached[1]
+
     try:
-        args = shlex.split(cmd)
-        with subprocess.Popen(
-            args,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            encoding="utf8",
-        ) as p:
-            stdout, stderr = p.communicate(cmd)
-            status = p.wait()
+        r = subprocess.run(
+            shlex.split(cmd), capture_output=True, text=True, errors="ignore"
+        )
+        status, stdout, stderr = r.returncode, r.stdout, r.stderr
     except Exception:
         status = -1
         stdout = stderr = None
 
+    if cache_ttl > 0:
+        _cmd_cache[cmd] = (time.monotonic(), (status, stdout, stderr))
+
     return status, stdout, stderr
 
@@ -2,12 +2,19 @@ import os
 import re
 import time
 import json
-from typing import Dict, List, Tuple, Union
+import asyncio
+import functools
+from typing import Dict, Iterable, List, Tuple, Union
 import subprocess
-import usb.core
 
 from .environment import Environment
-from .system import system_command, pipeable_command
+from .system import (
+    system_command,
+    pipeable_command,
+    exec_command_async,
+    invalidate_cache,
+    cache_command_result,
+)
 from .prompt import Prompt
 from . import log
 
@@ -45,6 +52,15 @@ lpadmin \
     udevadm info -a /dev/usb/lp1 | grep "JAG008676"
 """
 
+# Pulls the printer model straight out of a full `udevadm info -a` dump,
+# e.g.: ATTRS{product}=="ZTC ZT410-600dpi ZPL"
+_PRODUCT_RE = re.compile(r'product[^=\n]*=+"?([^"\n]*ZTC[^"\n]*)')
+
+# A ^HH config line: optional leading column, then the value (single
+# spaces allowed, e.g. "6.0 IPS"), then the uppercase setting name,
+# with columns separated by runs of 2+ spaces.
+_CFG_RE = re.compile(r"^\s*(?:\S+\s{2,})?(\S+(?: \S+)*)\s{2,}([A-Z][^\n]*?)\s*$")
+
 
 class Zebra:
     """
@@ -60,64 +76,109 @@ class Zebra:
         If there is only one printer connected, return one without any user prompts.
         If no printers are connected, return None.
         """
-        connected_printers = Zebra.connected_printers()
-        printer_of_choice = {}
-        
+        connected_printers = list(Zebra.connected_printers().items())
+
         if not connected_printers:
             return None
-        elif len(connected_printers) == 1:
-            printer_of_choice = next(iter(connected_printers))
-            serial_number = printer_of_choice["sn"]
-        elif len(connected_printers) > 1:
+
+        if len(connected_printers) == 1:
+            printer_of_choice = connected_printers[0][1]
+        else:
             log.warning("There are multiple printers connected to this device.")
-            for i, (sn, printer_info) in enumerate(connected_printers.items()):
+            for i, (sn, printer_info) in enumerate(connected_printers):
                 log.info(f"[{i+1}] {printer_info['name']}, {sn}")
 
-            user_choice = Prompt.choose(prompt="Which one would you like to work with?", options=["1", "2"])
-            printer_of_choice = connected_printers[list(connected_printers.keys())[int(user_choice)-1]]
-            serial_number = printer_of_choice["sn"]
+            options = [str(i + 1) for i in range(len(connected_printers))]
+            user_choice = Prompt.choose(prompt="Which one would you like to work with?", options=options)
+            printer_of_choice = connected_printers[int(user_choice) - 1][1]
+
+        serial_number = printer_of_choice["sn"]
 
         zebra = Zebra(serial_number=serial_number)
-        if not zebra.is_connected:
+        if not zebra.is_connected():
             return None
 
         return zebra
 
+    @staticmethod
+    async def _probe_lp_nodes_async() -> Dict[str, str]:
+        """
+        Run `udevadm info -a` against every /dev/usb/lpX node in one
+        concurrent wave and return {"/dev/usb/lpX": udevadm stdout}.
+        One pass instead of one subprocess per node per printer.
+        """
+
+        nodes = [f for f in os.listdir("/dev/usb/") if f.startswith("lp")]
+        results = await asyncio.gather(
+            *[exec_command_async(f"udevadm info -a /dev/usb/{f}") for f in nodes]
+        )
+
+        return {
+            f"/dev/usb/{f}": stdout
+            for f, (status, stdout, _) in zip(nodes, results)
+            if status == 0
+        }
+
+    @staticmethod
+    def _probe_lp_nodes() -> Dict[str, str]:
+        return asyncio.run(Zebra._probe_lp_nodes_async())
+
+    @staticmethod
+    async def _gather_probe() -> Tuple[Tuple[int, str, str], Tuple[int, str, str], Dict[str, str]]:
+        """
+        Run lpinfo, lpstat and the per-lpX udevadm probes concurrently.
+        The three are independent, so total latency is the slowest probe
+        rather than the sum. The lpinfo/lpstat results seed the command
+        cache for later system_command(..., cache_ttl=...) callers.
+        """
+
+        async def lp_nodes_or_empty():
+            try:
+                return await Zebra._probe_lp_nodes_async()
+            except FileNotFoundError:
+                # For some reason, some computers dont enumerate /dev/usb
+                return {}
+
+        lpinfo, lpstat, lp_nodes = await asyncio.gather(
+            exec_command_async("lpinfo --include-schemes usb -v"),
+            exec_command_async("lpstat -v"),
+            lp_nodes_or_empty(),
+        )
+
+        cache_command_result("lpinfo --include-schemes usb -v", lpinfo)
+        cache_command_result("lpstat -v", lpstat)
+
+        return lpinfo, lpstat, lp_nodes
+
     @staticmethod
     def connected_printers() -> Dict:
         """
         Returns a list of Tuples(serial_number, uri, /dev/sys/lpx).
         """
 
-        out = system_command("lpinfo --include-schemes usb -v")[1].strip().split("\n")
+        lpinfo, _, lp_nodes = asyncio.run(Zebra._gather_probe())
+        out = (lpinfo[1] or "").strip().split("\n")
+
         connected = {}
         for dev in out:
             if "Zebra" in dev:
-                sn = dev.rsplit("=", maxsplit=1)[-1]
+                sn = dev.rpartition("=")[2]
                 connected[sn] = {
-                    "uri": dev.rsplit(maxsplit=1)[-1],
+                    "uri": dev.rpartition(" ")[2],
                     "lp": "",
                     "name": "",
                     "sn": sn,
                 }
 
-                for f in os.listdir("/dev/usb/"):
-                    if not f.startswith("lp"):
-                        continue
-
-                    # Get /dev/usb/lpx path
-                    cmd = f"udevadm info -a /dev/usb/{f}"
-                    status, stdout, stderr = system_command(cmd)
+                for lp_path, stdout in lp_nodes.items():
                     if sn not in stdout:
                         continue
 
-                    connected[sn]["lp"] = f"/dev/usb/{f}"
+                    connected[sn]["lp"] = lp_path
 
-                    name = [
-                        x for x in stdout.splitlines() if re.search("product.*ZTC", x)
-                    ][0]
-                    if name:
-                        connected[sn]["name"] = name.split("=")[-1]
+                    m = _PRODUCT_RE.search(stdout)
+                    if m:
+                        connected[sn]["name"] = m.group(1).strip()
 
                     # See if installed in environment already
                     if sn in Environment.ENV_VARIABLES.get("MFG_PRINTER", []):
@@ -170,18 +231,19 @@ class Zebra:
         self.pid = pid
         self.lp_path = None
 
-        try:
-            for f in os.listdir("/dev/usb/"):
-                if not f.startswith("lp"):
-                    continue
+        # Cached is_connected() verdict, so hot paths (printing labels
+        # in a loop) dont re-run USB enumeration for every call.
+        self._connected = False
+        self._last_connected_at = 0.0
 
-                # Get /dev/usb/lpx path
-                cmd = f"udevadm info -a /dev/usb/{f} | grep {serial_number}"
-                status, _, _ = system_command(cmd)
-                if status != 0:
-                    continue
+        # Reset the USB device once before the first job, then only
+        # again after a failure -- not before every single label.
+        self._needs_reset = True
 
-                self.lp_path = f"/dev/usb/{f}"
+        try:
+            for lp_path, stdout in Zebra._probe_lp_nodes().items():
+                if serial_number in stdout:
+                    self.lp_path = lp_path
         except FileNotFoundError:
             # For some reason, some computers dont enumerate /dev/usb
             log.warning("Was unable to figure out /dev/usb/lpx!")
@@ -198,23 +260,16 @@ class Zebra:
             return None
 
         data = {}
-        for line in iter(response[1].split("\n")):
-            values = list(filter(None, line.split("  ")))[:-1]
-            if len(values) == 2:
-                try:
-                    val = float(values[0])
-                except ValueError:
-                    val = values[0]
-
-                data[values[-1].strip()] = val
-            elif len(values) == 3:
-                values = values[1:]
-                try:
-                    val = float(values[0])
-                except ValueError:
-                    val = values[0]
-
-                data[values[-1].strip()] = val
+        for line in response[1].splitlines():
+            m = _CFG_RE.match(line)
+            if not m:
+                continue
+
+            value, key = m.group(1), m.group(2).strip()
+            try:
+                data[key] = float(value)
+            except ValueError:
+                data[key] = value
 
         return data
 
@@ -222,18 +277,25 @@ class Zebra:
         """
         Send command to the printer; expect a response.
 
-        I have no clue what it is, but something is blocking the pipeable_command
-        subprocess. Because of this race condition, I send the command via os.system
-        and read it via subprocess. Otherwise printer ends up complaining with input/output errors.
+        The ZPL is written straight to the /dev/usb/lpX node -- no shell,
+        no echo subprocess, and nothing for the shell to mangle if the
+        ZPL contains $ or backticks. The node is opened unbuffered, so
+        each write reaches the driver immediately; usblp is a character
+        device and does not support fsync.
         """
 
         if not self.lp_path:
             log.error("The printer does not enumerate on /dev/usb/lpx on this system.")
             return (-1, None, None)
 
-        os.system(f"echo ^XA^XZ > {self.lp_path}")
-        time.sleep(0.1)
-        os.system(f"echo {zpl} > {self.lp_path}")
+        try:
+            with open(self.lp_path, "wb", buffering=0) as fh:
+                fh.write(b"^XA^XZ\n")
+                fh.write(zpl.encode("ascii") + b"\n")
+        except OSError as exc:
+            log.error(f"Failed to write to {self.lp_path}: {exc}")
+            return (-1, None, None)
+
         cmd = f"timeout 1s cat {self.lp_path}"
         response = pipeable_command(cmd)
         return response
@@ -263,38 +325,87 @@ class Zebra:
         Print - format the print job in ZPL.
         Note that cancels all previous jobs before printing.
 
+        Optimistic fast path: the job goes straight to lp, trusting the
+        state established at __init__. Only if lp bounces do we pay for
+        the USB enumeration check, a device reset, and one retry.
+
         Args
         ----
             zpl -- Zebra Programming Language code
         """
 
-        stdout = system_command(f"lpinfo --include-schemes usb -v")[1]
-        if self.serial_number not in stdout:
+        if not self.name:
+            return False
+
+        os.system("cancel -a -x")
+
+        if self._needs_reset:
+            self._reset_usb()
+
+        log.info(
+            f"Queueing a print job for Zebra SN {self.serial_number}, {self.name}.",
+            fg="yellow",
+        )
+
+        if self._submit_job(zpl):
+            return True
+
+        # Slow path: the job bounced. Re-check the connection (bypassing
+        # the cached verdict), reset the device and retry once.
+        self._needs_reset = True
+        self._last_connected_at = 0.0
+        if not self.is_connected():
             log.error(
                 f"{self.serial_number} is not connected. Skipping print.", bold=True
             )
             return False
 
-        if not self.name:
+        self._reset_usb()
+        return self._submit_job(zpl)
+
+    def _submit_job(self, zpl: str) -> bool:
+        """
+        Pipe a single ZPL job into lp. True when lp accepted it.
+        """
+
+        try:
+            r = subprocess.run(
+                ["lp", "-d", self.name, "-"],
+                input=zpl,
+                capture_output=True,
+                text=True,
+                timeout=5,
+            )
+        except Exception:
             return False
 
-        os.system("cancel -a -x")
+        return r.returncode == 0
 
-        if self.vid and self.pid:
-            dev = usb.core.find(
-                idVendor=int(self.vid, 16),
-                idProduct=int(self.pid, 16),
+    def print_many(self, zpls: Iterable[str]) -> bool:
+        """
+        Queue a batch of ZPL jobs through a single `lp` process.
+
+        When bursting hundreds of labels, spawning one lp per label is
+        the dominant cost; the printer happily chews through
+        back-to-back ^XA...^XZ blocks arriving on one stream.
+        """
+
+        if not self.is_connected():
+            log.error(
+                f"{self.serial_number} is not connected. Skipping print.", bold=True
             )
+            return False
 
-            try:
-                dev.reset()
-            except Exception:
-                pass
+        if not self.name:
+            return False
+
+        os.system("cancel -a -x")
 
-        time.sleep(0.3)
+        if self._needs_reset:
+            self._reset_usb()
 
         log.info(
-            f"Queueing a print job for Zebra SN {self.serial_number}, {self.name}.",
+            f"Queueing a batch of print jobs for Zebra SN {self.serial_number}, {self.name}.",
             fg="yellow",
         )
 
@@ -304,33 +415,66 @@ class Zebra:
             stdin=subprocess.PIPE,
             encoding="ascii",
         ) as p:
-            stdout = p.communicate(input=zpl)[0]
+            try:
+                for zpl in zpls:
+                    p.stdin.write(zpl)
+                p.stdin.close()
+            except OSError:
+                # lp died mid-batch (unknown destination, CUPS down) and
+                # the pipe broke under us.
+                self._needs_reset = True
+                return False
+
+        if p.returncode != 0:
+            self._needs_reset = True
+            return False
 
         return True
 
-    def is_connected(self) -> bool:
+    def _reset_usb(self):
         """
-        Check if the Zebra is connected via USB.
-        If connected and vid/pid are known, reset usb dev.
+        Reset the USB device (if vid/pid are known) and give it a moment
+        to re-enumerate. usb.core.find walks the entire bus, so this is
+        only invoked when a reset is actually pending.
         """
 
-        stdout = system_command(f"lpinfo --include-schemes usb -v")[1]
+        if self.vid and self.pid:
+            # Deferred import: pulling in the libusb bindings is only
+            # worth it when a reset is actually due.
+            import usb.core
 
-        if self.serial_number in stdout:
-            if self.vid and self.pid:
-                dev = usb.core.find(
-                    idVendor=int(self.vid, 16),
-                    idProduct=int(self.pid, 16),
-                )
+            dev = usb.core.find(
+                idVendor=int(self.vid, 16),
+                idProduct=int(self.pid, 16),
+            )
+
+            try:
+                dev.reset()
+            except Exception:
+                pass
 
-                try:
-                    dev.reset()
-                except Exception:
-                    pass
+            time.sleep(0.3)
 
-            return True
+        self._needs_reset = False
+
+    def is_connected(self) -> bool:
+        """
+        Check if the Zebra is connected via USB.
+        The verdict is cached on the instance for 2 seconds so that
+        back-to-back calls dont re-enumerate the bus.
+        """
 
-        return False
+        if time.monotonic() - self._last_connected_at < 2.0:
+            return self._connected
+
+        stdout = system_command("lpinfo --include-schemes usb -v", cache_ttl=2)[1]
+        self._connected = bool(stdout) and self.serial_number in stdout
+        self._last_connected_at = time.monotonic()
+        if not self._connected:
+            # Whatever comes back will need a reset before printing.
+            self._needs_reset = True
+
+        return self._connected
 
     @staticmethod
     def install_printer():
@@ -342,9 +486,8 @@ class Zebra:
         """
 
         log.info("Discovering connected printers... This may take up to 15 sec...")
-        stdout = system_command(f"lpinfo --include-schemes usb -v")[1]
-        printers_found = list(filter(None, stdout.split("\n")))
-        zebra_printers = list(filter(lambda k: "Zebra" in k, printers_found))
+        stdout = system_command("lpinfo --include-schemes usb -v", cache_ttl=3)[1]
+        zebra_printers = [line for line in stdout.splitlines() if line and "Zebra" in line]
 
         if len(zebra_printers) == 0:
             log.error("No Zebra printers connected.")
@@ -359,9 +502,9 @@ class Zebra:
             return False
 
         # direct usb://Zebra%20Technologies/ZTC%20ZT410-600dpi%20ZPL?serial=18J194403879
-        serial_number = zebra_printers[0].split("serial=")[1]
-        uri = "usb://" + zebra_printers[0].split("usb://", maxsplit=1)[1]
-        model = uri.split("usb://", maxsplit=1)[-1].split("?", maxsplit=1)[0]
+        serial_number = zebra_printers[0].partition("serial=")[2]
+        uri = "usb://" + zebra_printers[0].partition("usb://")[2]
+        model = uri.removeprefix("usb://").partition("?")[0]
         model = model.replace("%20", "-").replace("/", "-")
 
         if not serial_number:
@@ -369,7 +512,7 @@ class Zebra:
             return False
 
         # Now that we have the serial check if printer is installed via lpstat
-        stdout = system_command(f"lpstat -v")[1]
+        stdout = system_command("lpstat -v", cache_ttl=3)[1]
         if serial_number not in stdout:
             log.info("Printer must be installed first.")
             # Note that adding it under model-serial name.
@@ -379,11 +522,20 @@ class Zebra:
             log.info("Restarting cups.service...")
             os.system("systemctl restart cups")
             time.sleep(2)
+            # lpadmin/cups restart just changed printer state; make sure
+            # nobody reuses the pre-install lpinfo/lpstat output.
+            invalidate_cache("lpinfo --include-schemes usb -v", "lpstat -v")
+            Zebra._lpstat_map.cache_clear()
+
+        # Get VID:PID -- lsusb lines look like
+        # "Bus 001 Device 004: ID 0a5f:0120 Zebra Technologies ZTC ..."
+        lsusb = system_command("lsusb")[1] or ""
+        m = re.search(r"([0-9a-fA-F]{4}):([0-9a-fA-F]{4}).*Zebra", lsusb)
+        if not m:
+            log.error("Couldnt extract the Zebra VID:PID from lsusb!")
+            return False
 
-        # Get VID:PID
-        cmd = "lsusb | grep 'Zebra' | grep -oP '[a-zA-Z0-9]{4}:[a-zA-Z0-9]{4}'"
-        with subprocess.Popen(cmd, stdout=subprocess.PIPE, shell=True) as p:
-            vid, pid = p.communicate()[0].strip().decode("utf-8").split(":")
+        vid, pid = m.group(1), m.group(2)
 
         # Update and reload /etc/udev/rules.d/?.rules
         if not os.path.isfile("/etc/udev/rules.d/99-zebra.rules"):
@@ -414,30 +566,39 @@ class Zebra:
         zebra.test_print()
         return True
 
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _lpstat_map() -> Dict[str, str]:
+        """
+        Parse `lpstat -v` once per process into {serial_number: printer_name}.
+        Cleared via _lpstat_map.cache_clear() whenever a printer is
+        (un)installed, i.e. after lpadmin + cups restart.
+        """
+
+        stdout = system_command("lpstat -v", cache_ttl=3)[1] or ""
+        printers = {}
+        for line in stdout.splitlines():
+            # "device for ZTC-ZT410-XXX: usb://...?serial=18J194403879"
+            name = line.partition(":")[0].removeprefix("device for ").strip()
+            sn = line.rpartition("=")[2].strip()
+            if sn and name:
+                printers[sn] = name
+
+        return printers
+
     @staticmethod
     def get_printer_name(serial_number: str) -> str:
         """
         Decode printer name from printer serial number via lpstat -v.
         """
-        stdout = system_command(f"lpstat -v")[1]
-        if serial_number not in stdout:
+        printer_name = Zebra._lpstat_map().get(serial_number)
+        if not printer_name:
             log.error(
                 f"Is {serial_number} a valid Zebra serial number? "
                 "Cannot find this printer via lpstat -v."
             )
             return None
 
-        printers = list(filter(None, stdout.split("\n")))
-        my_printer = None
-        for printer in printers:
-            if serial_number in printer:
-                my_printer = printer.rstrip()
-                break
-
-        if not my_printer:
-            raise Exception("Something went wrong.")
-
-        printer_name = my_printer.split(":")[0].split()[-1]
         return printer_name
 
 def main():